@@ -1,22 +1,100 @@
 # app.py
-from flask import Flask, render_template, jsonify, request
-import json
+from flask import Flask, render_template, jsonify, request, Response
+from flask.json.provider import DefaultJSONProvider
+import atexit
+import functools
+import gzip
+import hashlib
 import os
+import queue
+import shutil
+import time
+import brotli
 import gspread
+import msgpack
+import orjson
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+from flask_compress import Compress
 from pathlib import Path
 
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson (used by jsonify and request.get_json)."""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        # orjson ignores Flask's indent/sort_keys args; falls back to Flask's default() for unknown types
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json_provider_class = ORJSONProvider
+app.json = ORJSONProvider(app)
+
+# Response compression (Flask-Compress); the cached /api/bins and /api/lights bodies are precompressed with the same settings
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_ALGORITHM_STREAMING"] = ["br", "gzip"]  # streamed /api/bins; the default omits gzip
+app.config["COMPRESS_LEVEL"] = 4      # gzip
+app.config["COMPRESS_BR_LEVEL"] = 4
+app.config["COMPRESS_MIN_SIZE"] = 1024
+Compress(app)
 
 # Config (use env vars in production)
 SHEET_ID = os.getenv("SHEET_ID", "https://docs.google.com/spreadsheets/d/1KA88moq8f59KCK2mjl_gsuBiOcOa2PcvZf5_Ryrac4E/edit?gid=0#gid=0")
 SHEET_NAME_BINS = os.getenv("SHEET_NAME_BINS", "devices")
 SHEET_NAME_TASKS = os.getenv("SHEET_NAME_TASKS", "tasks")
 GOOGLE_CREDS_FILE = os.getenv("GOOGLE_CREDS_FILE", "data/credentials.json")  # Service account JSON
+SHEET_CACHE_TTL = float(os.getenv("SHEET_CACHE_TTL", "30"))  # seconds
+SHEET_FAILURE_TTL = float(os.getenv("SHEET_FAILURE_TTL", "5"))  # seconds a failed fetch is remembered
+BINS_STREAM_ROWS = int(os.getenv("BINS_STREAM_ROWS", "1000"))  # stream the first /api/bins build above this many rows
 
 # Local fallback data files
 BINS_FALLBACK = Path("data/bins_data.json")
 LIGHTS_FALLBACK = Path("data/lights_data.json")
 
+# Telemetry log (concatenated MessagePack records, see scripts/read_log.py), written in batches by a background thread
+TELEMETRY_LOG = Path("data/telemetry_log.msgpack")
+TELEMETRY_BATCH_BYTES = 64 * 1024   # flush once this much is buffered...
+TELEMETRY_FLUSH_INTERVAL = 0.5      # ...or this many seconds after the first buffered record
+TELEMETRY_QUEUE_MAX = 10000         # records waiting for the writer; POSTs are rejected beyond this
+TELEMETRY_MAX_PENDING = 4 * 1024 * 1024  # unwritten bytes kept for retry while the log is failing
+TELEMETRY_RETRY_INTERVAL = 5.0      # seconds between reopen attempts after a write error
+
+def _json_etag(json_bytes):
+    """Content hash of an encoded response body, used as its ETag."""
+    return hashlib.blake2b(json_bytes, digest_size=16).hexdigest()
+
+# Parsed lights fallback plus its encoded {"data": [...]} bytes and ETag; reloaded when the file's mtime changes
+_lights_cache = {"mtime": 0, "data": [], "json_bytes": b'{"data":[]}', "etag": _json_etag(b'{"data":[]}'), "encoded": {}}
+_lights_lock = threading.Lock()
+
+def _load_lights():
+    """Return the cached lights fallback, re-reading the file only if it changed on disk."""
+    global _lights_cache
+    try:
+        mtime = LIGHTS_FALLBACK.stat().st_mtime
+    except FileNotFoundError:
+        mtime = 0
+    with _lights_lock:
+        if mtime != _lights_cache["mtime"]:
+            data = orjson.loads(LIGHTS_FALLBACK.read_bytes()) if mtime else []
+            json_bytes = orjson.dumps({"data": data}, option=ORJSONProvider.option)
+            # swap in a new dict so readers never see a half-updated entry
+            _lights_cache = {"mtime": mtime, "data": data, "json_bytes": json_bytes, "etag": _json_etag(json_bytes), "encoded": {}}
+        return _lights_cache
+
+@functools.lru_cache(maxsize=32)
+def _log_exception_once(msg, minute):
+    app.logger.exception(msg)
+
+def log_once_per_minute(msg):
+    """app.logger.exception, but each distinct message (with traceback) is logged at most once a minute.
+    Must be called from an except block."""
+    _log_exception_once(msg, int(time.time()) // 60)
+
 # Lazy gspread client initializer
 _gspread_client = None
 
@@ -36,11 +114,18 @@ def get_gspread_client():
         _gspread_client = gspread.service_account(filename=str(creds_path))
         return _gspread_client
     except Exception as exc:
-        app.logger.exception("Failed to create gspread client:")
+        log_once_per_minute("Failed to create gspread client:")
         _gspread_client = None
         return None
 
-def get_sheet_data(sheet_name):
+# In-process cache of sheet records:
+# sheet_name -> {"data": records, "json_bytes": bytes or None, "etag": str or None, "encoded": {content-encoding: bytes}}
+_sheet_cache = TTLCache(maxsize=8, ttl=SHEET_CACHE_TTL)
+_sheet_cache_lock = threading.Lock()
+_sheet_failed_at = {}    # sheet_name -> time.monotonic() of the last failed fetch
+_sheet_fetch_locks = {}  # sheet_name -> Lock held while that sheet is being fetched
+
+def _fetch_sheet_data(sheet_name):
     """Fetch all rows from a Google Sheet as list of dicts. Returns None on failure."""
     client = get_gspread_client()
     if not client:
@@ -51,9 +136,221 @@ def get_sheet_data(sheet_name):
         records = worksheet.get_all_records()
         return records
     except Exception as exc:
-        app.logger.exception(f"Error reading sheet '{sheet_name}':")
+        log_once_per_minute(f"Error reading sheet '{sheet_name}':")
         return None
 
+def _cached_sheet_entry(sheet_name):
+    """(entry, known_failed) from the caches; call with _sheet_cache_lock held."""
+    failed_at = _sheet_failed_at.get(sheet_name)
+    recently_failed = failed_at is not None and time.monotonic() - failed_at < SHEET_FAILURE_TTL
+    return _sheet_cache.get(sheet_name), recently_failed
+
+def _get_sheet_entry(sheet_name):
+    """Return the cached entry for a sheet, fetching it on a miss. Returns None on failure.
+    Only one thread fetches a given sheet at a time (others wait for its result), and a failure
+    is remembered for SHEET_FAILURE_TTL seconds so an outage isn't re-fetched by every request."""
+    with _sheet_cache_lock:
+        entry, failed = _cached_sheet_entry(sheet_name)
+        if entry is not None or failed:
+            return entry
+        fetch_lock = _sheet_fetch_locks.setdefault(sheet_name, threading.Lock())
+    with fetch_lock:
+        with _sheet_cache_lock:
+            # another thread may have fetched (or failed) while we waited
+            entry, failed = _cached_sheet_entry(sheet_name)
+            if entry is not None or failed:
+                return entry
+        records = _fetch_sheet_data(sheet_name)
+        with _sheet_cache_lock:
+            if records is None:
+                _sheet_failed_at[sheet_name] = time.monotonic()
+                return None
+            _sheet_failed_at.pop(sheet_name, None)
+            entry = {"data": records, "json_bytes": None, "etag": None, "encoded": {}}
+            _sheet_cache[sheet_name] = entry
+            return entry
+
+def get_sheet_data(sheet_name):
+    """Rows of a Google Sheet as list of dicts (cached for SHEET_CACHE_TTL seconds). Returns None on failure."""
+    entry = _get_sheet_entry(sheet_name)
+    return entry["data"] if entry else None
+
+def _entry_json(entry):
+    """Encoded {"data": [...]} bytes for a cache entry (and its ETag), built once per entry."""
+    if entry["json_bytes"] is None:
+        _set_entry_json(entry, orjson.dumps({"data": entry["data"]}, option=ORJSONProvider.option))
+    return entry["json_bytes"]
+
+def _set_entry_json(entry, json_bytes):
+    entry["etag"] = _json_etag(json_bytes)  # set before json_bytes, which readers check
+    entry["json_bytes"] = json_bytes
+
+def _encoded_body(cached, encoding):
+    """json_bytes of a cache entry compressed with encoding ("br" or "gzip"), compressed once per entry."""
+    body = cached["encoded"].get(encoding)
+    if body is None:
+        if encoding == "br":
+            body = brotli.compress(cached["json_bytes"], quality=app.config["COMPRESS_BR_LEVEL"])
+        else:
+            body = gzip.compress(cached["json_bytes"], compresslevel=app.config["COMPRESS_LEVEL"])
+        cached["encoded"][encoding] = body
+    return body
+
+def _cached_json_response(cached, max_age):
+    """Response for a cache entry's pre-encoded JSON body, precompressed if the client accepts it.
+    Answers 304 if the client already has this ETag."""
+    encoding = None
+    if len(cached["json_bytes"]) >= app.config["COMPRESS_MIN_SIZE"]:
+        encoding = request.accept_encodings.best_match(app.config["COMPRESS_ALGORITHM"])
+    # same per-encoding ETag scheme as Flask-Compress ("<etag>:br")
+    etag = f'{cached["etag"]}:{encoding}' if encoding else cached["etag"]
+    if request.if_none_match.contains_weak(etag):  # If-None-Match uses weak comparison (RFC 7232)
+        resp = Response(status=304)
+    elif encoding:
+        resp = Response(_encoded_body(cached, encoding), mimetype="application/json")
+        # Flask-Compress leaves responses that already have a Content-Encoding alone
+        resp.headers["Content-Encoding"] = encoding
+    else:
+        resp = Response(cached["json_bytes"], mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.max_age = max_age
+    return resp
+
+def _stream_json_rows(rows, chunk_rows=256):
+    """Yield {"data": [...]} for a list of rows piecewise, so the first bytes go out before the whole body is encoded."""
+    yield b'{"data":['
+    for i in range(0, len(rows), chunk_rows):
+        chunk = b",".join(orjson.dumps(r, option=ORJSONProvider.option) for r in rows[i:i + chunk_rows])
+        yield b"," + chunk if i else chunk
+    yield b"]}"
+
+def _stream_and_cache(entry):
+    """Stream a cache entry's body and, once fully sent, keep it as the entry's json_bytes/ETag."""
+    parts = []
+    for chunk in _stream_json_rows(entry["data"]):
+        parts.append(chunk)
+        yield chunk
+    # only reached if the client read the whole body; otherwise the next request rebuilds it
+    _set_entry_json(entry, b"".join(parts))
+
+def invalidate_sheet_cache(sheet_name):
+    with _sheet_cache_lock:
+        _sheet_cache.pop(sheet_name, None)
+        _sheet_failed_at.pop(sheet_name, None)
+
+_tele_queue = queue.Queue(maxsize=TELEMETRY_QUEUE_MAX)
+_tele_error = None  # last OSError from the writer; set while the log can't be written
+
+def _next_telemetry_batch(first_timeout):
+    """Collect queued records until TELEMETRY_BATCH_BYTES or TELEMETRY_FLUSH_INTERVAL. Returns (records, stop)."""
+    try:
+        record = _tele_queue.get(timeout=first_timeout)
+    except queue.Empty:
+        return [], False
+    if record is None:
+        return [], True
+    batch, size = [record], len(record)
+    deadline = time.monotonic() + TELEMETRY_FLUSH_INTERVAL
+    while size < TELEMETRY_BATCH_BYTES:
+        try:
+            record = _tele_queue.get(timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        if record is None:
+            return batch, True
+        batch.append(record)
+        size += len(record)
+    return batch, False
+
+def _telemetry_writer():
+    """Drain queued telemetry records and append them to TELEMETRY_LOG with one write() per batch.
+    On OSError the unwritten bytes are kept (up to TELEMETRY_MAX_PENDING) and the log is reopened periodically."""
+    global _tele_error
+    fh = None
+    pending = b""
+    stopping = False
+    while True:
+        if fh is None:
+            try:
+                os.makedirs(TELEMETRY_LOG.parent, exist_ok=True)
+                fh = open(TELEMETRY_LOG, "ab", buffering=0)
+                _tele_error = None
+            except OSError as e:
+                _tele_error = e
+                log_once_per_minute(f"Cannot open telemetry log {TELEMETRY_LOG}:")
+        if stopping:
+            break
+        batch, stopping = _next_telemetry_batch(None if fh else TELEMETRY_RETRY_INTERVAL)
+        pending += b"".join(batch)
+        if fh is not None and pending:
+            try:
+                # raw write() may be short; keep going until the whole batch is on disk
+                while pending:
+                    pending = pending[fh.write(pending):]
+            except OSError as e:
+                _tele_error = e
+                log_once_per_minute(f"Error writing telemetry log {TELEMETRY_LOG}:")
+                fh.close()
+                fh = None
+        if len(pending) > TELEMETRY_MAX_PENDING:
+            print(f"Telemetry log unavailable, dropping {len(pending)} buffered bytes")
+            pending = b""
+    if pending:
+        print(f"Telemetry log unavailable at exit, dropping {len(pending)} buffered bytes")
+    if fh is not None:
+        fh.close()
+
+_tele_writer = threading.Thread(target=_telemetry_writer, name="telemetry-writer", daemon=True)
+_tele_writer.start()
+
+@atexit.register
+def _flush_telemetry():
+    # Sentinel tells the writer to flush what it has and exit
+    try:
+        _tele_queue.put(None, timeout=1)
+    except queue.Full:
+        return
+    _tele_writer.join(timeout=5)
+
+# Evidence images are written to disk off the request thread
+EVIDENCE_MAX_PENDING = 32  # queued + running writes; each holds the upload's bytes or a dup'd fd
+_evidence_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="evidence-writer")
+_evidence_slots = threading.BoundedSemaphore(EVIDENCE_MAX_PENDING)
+
+def _save_evidence(write, filepath, src):
+    """Pool task: run write(filepath, src), reporting failures (the request has already returned)."""
+    try:
+        write(filepath, src)
+    except OSError as e:
+        print(f"Error writing evidence {filepath}:", e)
+    finally:
+        _evidence_slots.release()
+
+def _write_evidence(filepath, payload):
+    with open(filepath, "wb") as fh:
+        fh.write(payload)
+
+def _copy_evidence_fd(filepath, src_fd):
+    """Copy a disk-spooled upload (our own dup of its fd) to filepath in the kernel via sendfile."""
+    with open(src_fd, "rb") as src, open(filepath, "wb") as dst:
+        size = os.fstat(src_fd).st_size
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            # no file-to-file sendfile on this platform: plain buffered copy
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst, length=1 << 20)
+
+# Preload at import so the first request doesn't pay for the read
+_load_lights()
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -64,37 +361,47 @@ def bins_page():
     if bins_data is None:
         # Fallback to local file if Google Sheets unavailable
         if BINS_FALLBACK.exists():
-            with open(BINS_FALLBACK, "r", encoding="utf-8") as f:
-                bins_data = json.load(f)
+            bins_data = orjson.loads(BINS_FALLBACK.read_bytes())
         else:
             bins_data = []
     return render_template("bins.html", bins=bins_data)
 
 @app.route("/api/bins")
 def bins_api():
-    data = get_sheet_data(SHEET_NAME_BINS)
-    if data is None:
+    entry = _get_sheet_entry(SHEET_NAME_BINS)
+    if entry is None:
         return jsonify({"error": "Could not load Google Sheet (falling back to local file)."}), 503
-    return jsonify({"data": data})
+    if entry["json_bytes"] is None and len(entry["data"]) > BINS_STREAM_ROWS:
+        # First request for a large sheet: stream rows while building the cached body,
+        # later requests get the cached bytes (ETag/304/precompressed) below
+        return Response(_stream_and_cache(entry), mimetype="application/json")
+    _entry_json(entry)
+    # Hot path: skip jsonify and serve the cached orjson (and compressed) bytes directly, or a 304 for polling dashboards
+    return _cached_json_response(entry, int(SHEET_CACHE_TTL))
+
+@app.route("/api/bins/refresh", methods=["POST"])
+def bins_refresh():
+    """Drop the cached bins sheet so the next request re-reads Google Sheets"""
+    invalidate_sheet_cache(SHEET_NAME_BINS)
+    return jsonify({"status": "success", "message": "Bins cache cleared"}), 200
 
 @app.route("/lights")
 def lights_page():
     # For now lights are local JSON fallback
-    if LIGHTS_FALLBACK.exists():
-        with open(LIGHTS_FALLBACK, "r", encoding="utf-8") as f:
-            lights_data = json.load(f)
-    else:
-        lights_data = []
+    lights_data = _load_lights()["data"]
     return render_template("lights.html", lights=lights_data)
 
 @app.route("/api/lights")
 def lights_api():
-    if LIGHTS_FALLBACK.exists():
-        with open(LIGHTS_FALLBACK, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = []
-    return jsonify({"data": data})
+    lights = _load_lights()
+    # max-age=0: clients revalidate every time, so edits to the file show up immediately
+    return _cached_json_response(lights, 0)
+
+def _telemetry_unavailable(message):
+    print("Error:", message)
+    resp = jsonify({"status": "error", "message": message})
+    resp.headers["Retry-After"] = str(int(TELEMETRY_RETRY_INTERVAL))
+    return resp, 503
 
 @app.route("/api/telemetry", methods=["POST"])
 def receive_telemetry():
@@ -104,10 +411,14 @@ def receive_telemetry():
         print("Telemetry received:", data)
 
         # Example: save to file or print (you can extend this to Google Sheets)
-        # Ensure data directory exists
-        os.makedirs("data", exist_ok=True)
-        with open("data/telemetry_log.json", "a", encoding="utf-8") as f:
-            f.write(json.dumps(data) + "\n")
+        # Queued for the background writer; it appends to TELEMETRY_LOG in batches
+        # Server-side outage/backpressure -> 503 so senders retry rather than drop the reading
+        if _tele_error is not None or not _tele_writer.is_alive():
+            return _telemetry_unavailable(f"Telemetry log unavailable: {_tele_error or 'writer stopped'}")
+        try:
+            _tele_queue.put_nowait(msgpack.packb(data, use_bin_type=True))
+        except queue.Full:
+            return _telemetry_unavailable("Telemetry log backlog full")
 
         return jsonify({"status": "success", "message": "Telemetry received"}), 200
     except Exception as e:
@@ -131,13 +442,36 @@ def upload_evidence():
         filename = f"evidence_{safe_device}_{safe_ts}.jpg"
         os.makedirs("data", exist_ok=True)
         filepath = os.path.join("data", filename)
-        file.save(filepath)
+        if not _evidence_slots.acquire(blocking=False):
+            resp = jsonify({"status": "error", "message": "Evidence writer busy, retry later"})
+            resp.headers["Retry-After"] = "5"
+            return resp, 503
+        # The stream closes with the request, so hand the pool either a dup of the temp file's fd
+        # (uploads Werkzeug already spooled to disk: copied without entering Python) or the bytes
+        # (in-memory uploads; asking those for fileno() would force a synchronous rollover to disk)
+        src_fd = None
+        if getattr(file.stream, "_rolled", True):
+            try:
+                src_fd = os.dup(file.stream.fileno())
+            except (AttributeError, OSError):
+                pass
+        try:
+            if src_fd is None:
+                _evidence_pool.submit(_save_evidence, _write_evidence, filepath, file.read())
+            else:
+                _evidence_pool.submit(_save_evidence, _copy_evidence_fd, filepath, src_fd)
+        except BaseException:
+            _evidence_slots.release()
+            if src_fd is not None:
+                os.close(src_fd)
+            raise
         print(f"Evidence received from {device_id} -> {filename}")
-        return jsonify({"status": "success", "file_saved": filename}), 200
+        # 202: the write happens in the background (body unchanged for existing clients)
+        return jsonify({"status": "success", "file_saved": filename}), 202
     except Exception as e:
         print("Error uploading evidence:", e)
         return jsonify({"status": "error", "message": str(e)}), 400
 
 if __name__ == "__main__":
-    # For local development only. In production use gunicorn as configured on Render.
+    # For local development only. In production use gunicorn (see gunicorn.conf.py / wsgi.py).
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=True)
@@ -0,0 +1,12 @@
+# gunicorn.conf.py
+# Picked up automatically by gunicorn when started from the repo root, e.g.
+#   gunicorn wsgi:application
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# gevent workers: cooperative IO so many telemetry clients are served concurrently per worker
+workers = int(os.getenv("WEB_CONCURRENCY", (2 * (os.cpu_count() or 1)) + 1))
+worker_class = "gevent"
+worker_connections = 1000
+keepalive = 30
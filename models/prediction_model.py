@@ -1,3 +1,13 @@
+import numpy as np
+
+try:
+    from numba import njit, prange  # optional: pip install numba
+except ImportError:
+    njit = None
+
+# Above this many bins predict_fill_rate_batch uses the compiled parallel kernel (when numba is installed)
+NUMBA_MIN_BINS = 100_000
+
 # Simple placeholder for predictive model (e.g., bin fill-time prediction)
 def predict_fill_rate(current_fill, avg_daily_increase=5):
     """Predict how many days until full."""
@@ -7,5 +17,32 @@ def predict_fill_rate(current_fill, avg_daily_increase=5):
     days = remaining / avg_daily_increase
     return round(days, 1)
 
+def predict_fill_rate_batch(current_fill, avg_daily_increase=5):
+    """Vectorized predict_fill_rate: days until full for many bins at once (NaN where no prediction)."""
+    current_fill = np.asarray(current_fill, dtype=np.float64)
+    avg_daily_increase = np.asarray(avg_daily_increase, dtype=np.float64)
+    if predict_fill_rate_numba is not None and current_fill.ndim == 1 and current_fill.size >= NUMBA_MIN_BINS:
+        avg = np.ascontiguousarray(np.broadcast_to(avg_daily_increase, current_fill.shape))
+        return predict_fill_rate_numba(current_fill, avg)
+    remaining = 100.0 - current_fill
+    out = np.where(avg_daily_increase > 0, remaining / np.maximum(avg_daily_increase, 1e-9), np.nan)
+    return np.round(out, 1)
+
+if njit is not None:
+    # No fastmath: missing fill levels arrive as NaN and must stay NaN
+    @njit(parallel=True, cache=True)
+    def predict_fill_rate_numba(cur, avg):
+        """predict_fill_rate_batch for 1-D float64 arrays as one fused loop across all cores."""
+        out = np.empty_like(cur)
+        for i in prange(cur.shape[0]):
+            if avg[i] > 0:
+                out[i] = round((100.0 - cur[i]) / avg[i], 1)
+            else:
+                out[i] = np.nan
+        return out
+else:
+    predict_fill_rate_numba = None
+
 if __name__ == "__main__":
     print(predict_fill_rate(70))  # Example: 6.0 days to full
+    print(predict_fill_rate_batch([70, 20, 95]))  # Example: [ 6. 16.  1.]
@@ -0,0 +1,21 @@
+# scripts/read_log.py
+# Dump the binary telemetry log written by app.py as JSON lines.
+#   python scripts/read_log.py [path]
+import sys
+import json
+import msgpack
+
+LOG_FILE = "data/telemetry_log.msgpack"
+
+def iter_records(path=LOG_FILE):
+    """Yield each telemetry record (dict) from a MessagePack log."""
+    with open(path, "rb") as f:
+        yield from msgpack.Unpacker(f, raw=False)
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else LOG_FILE
+    for record in iter_records(path):
+        print(json.dumps(record))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # scripts/seed_data.py
 import gspread
+from gspread.utils import absolute_range_name
 from datetime import datetime
 import json
 from pathlib import Path
@@ -32,6 +33,11 @@ telemetry = {
     "raw_payload": {"rssi": -65}
 }
 
+def ensure_rows(ws, last_row):
+    """Grow the sheet's grid so last_row exists (values_batch_update doesn't, unlike append_row)."""
+    if last_row > ws.row_count:
+        ws.add_rows(last_row - ws.row_count)
+
 def main():
     # ensure creds exist
     cred_path = Path(CRED_FILE)
@@ -49,8 +55,27 @@ def main():
         print("Devices sheet not found:", e)
         return
 
-    records = ws.get_all_records()
-    if not any(str(r.get("id")) == device["id"] for r in records):
+    # Telemetry sheet (created if missing)
+    try:
+        t_ws = sh.worksheet(TELEMETRY_SHEET)
+        t_created = False
+    except Exception:
+        # Attempt to create sheet if missing
+        t_ws = sh.add_worksheet(title=TELEMETRY_SHEET, rows="1000", cols="20")
+        t_created = True
+
+    # One read for both id columns: gives existing device ids and the next free row of each sheet
+    dev_col, tel_col = [
+        vr.get("values", [])
+        for vr in sh.values_batch_get([
+            absolute_range_name(DEVICES_SHEET, "A:A"),
+            absolute_range_name(TELEMETRY_SHEET, "A:A"),
+        ])["valueRanges"]
+    ]
+    ids = {r[0] for r in dev_col[1:] if r}
+
+    updates = []
+    if device["id"] not in ids:
         # create header order same as earlier: id,device_name,device_type,model,lat,lon,installed_on,firmware_version,status,notes
         row = [
             device["id"],
@@ -64,30 +89,42 @@ def main():
             device["status"],
             device["notes"]
         ]
-        ws.append_row(row)
-        print("Device appended.")
+        dev_row = len(dev_col) + 1
+        ensure_rows(ws, dev_row)
+        updates.append({
+            "range": absolute_range_name(DEVICES_SHEET, f"A{dev_row}:J{dev_row}"),
+            "majorDimension": "ROWS",
+            "values": [row],
+        })
     else:
         print("Device already exists in sheet.")
 
-    # Append telemetry (create telemetry sheet row)
-    try:
-        t_ws = sh.worksheet(TELEMETRY_SHEET)
-    except Exception:
-        # Attempt to create sheet if missing
-        t_ws = sh.add_worksheet(title=TELEMETRY_SHEET, rows="1000", cols="20")
+    t_rows = []
+    if t_created:
         # Add header row consistent with earlier: id,device_id,timestamp,fill_pct,battery_pct,raw_payload
-        t_ws.append_row(["id","device_id","timestamp","fill_pct","battery_pct","raw_payload"])
-
+        t_rows.append(["id","device_id","timestamp","fill_pct","battery_pct","raw_payload"])
     next_id = t_ws.row_count  # simple; we don't need exact IDs
-    t_row = [
+    t_rows.append([
         next_id,
         telemetry["device_id"],
         telemetry["timestamp"],
         telemetry["fill_pct"],
         telemetry["battery_pct"],
         json.dumps(telemetry["raw_payload"])
-    ]
-    t_ws.append_row(t_row)
+    ])
+    t_first = len(tel_col) + 1
+    t_last = t_first + len(t_rows) - 1
+    ensure_rows(t_ws, t_last)
+    updates.append({
+        "range": absolute_range_name(TELEMETRY_SHEET, f"A{t_first}:F{t_last}"),
+        "majorDimension": "ROWS",
+        "values": t_rows,
+    })
+
+    # Single write round trip for device + telemetry rows
+    sh.values_batch_update(body={"valueInputOption": "RAW", "data": updates})
+    if len(updates) > 1:
+        print("Device appended.")
     print("Telemetry appended.")
 
 if __name__ == "__main__":
@@ -10,7 +10,15 @@ Config via environment variables:
   INTERVAL (seconds between posts per device)
   DUMP_PROB (probability per post to simulate illegal dump, 0-1)
 """
-import os, time, random, threading, requests, uuid
+import os, time, random, asyncio, requests, uuid
+import aiohttp
+import numpy as np
+try:
+    import uvloop  # faster event loop; not available on Windows
+except ImportError:
+    uvloop = None
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 SIM_ENDPOINT = os.getenv("SIM_ENDPOINT", "http://127.0.0.1:5000/api/telemetry")
@@ -21,38 +29,89 @@ DUMP_PROB = float(os.getenv("DUMP_PROB", "0.06"))  # ~6% chance per post
 BASE_LAT = float(os.getenv("BASE_LAT", "12.9716"))
 BASE_LON = float(os.getenv("BASE_LON", "77.5946"))
 
+rng = np.random.default_rng()
+
+# Shared keep-alive session for the (threaded) evidence path: reuses TCP/TLS connections across uploads
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+
+# Placeholder evidence images, fetched once at startup and reused for every upload
+IMG_POOL_SIZE = 8
+_IMG_POOL = []
+
+def fetch_placeholder_image(i):
+    try:
+        return _SESSION.get(f"https://picsum.photos/400/300?random={i}", timeout=8).content
+    except Exception as e:
+        print(f"Placeholder image fetch failed: {e}")
+        return None
+
+def load_image_pool(size=IMG_POOL_SIZE):
+    # fetched concurrently, so an unreachable host costs one timeout rather than one per image
+    with ThreadPoolExecutor(max_workers=size) as pool:
+        _IMG_POOL.extend(img for img in pool.map(fetch_placeholder_image, range(size)) if img)
+    print("Image pool ready:", len(_IMG_POOL), "images")
+
+_iso_cache = (0, "")  # (unix second, ISO string) — rebuilt at most once per second
+
 def now_iso():
-    return datetime.now(timezone.utc).isoformat()
+    global _iso_cache
+    sec = int(time.time())
+    if sec != _iso_cache[0]:
+        _iso_cache = (sec, datetime.fromtimestamp(sec, timezone.utc).isoformat())
+    return _iso_cache[1]
 
-def make_telemetry(device_id, lat, lon, baseline_fill):
-    # slow drift up, occasional drop simulated by random choice
-    drift = random.uniform(-0.6, 1.2)
-    noise = random.gauss(0, 2.0)
-    fill = max(0, min(100, baseline_fill + drift + noise))
-    if random.random() < 0.01:  # rare emptying event
-        fill = max(0, fill - random.uniform(30, 95))
-    battery = max(10.0, 100 - random.uniform(0, 0.3))
-    status = "Full" if fill > 80 else "Active"
+def make_fleet(num):
+    """Per-device state as struct-of-arrays: one array per field, index i is device i."""
     return {
-        "device_id": device_id,
-        "timestamp": now_iso(),
-        "lat": round(lat,6),
-        "lon": round(lon,6),
-        "fill_pct": round(fill,2),
-        "battery_pct": round(battery,2),
-        "rssi": -60 + random.randint(-8,8),
-        "status": status
+        "ids": [f"VIRTUAL-BIN-{i+1:03d}" for i in range(num)],
+        "lat": np.round(BASE_LAT + rng.uniform(-0.006, 0.006, num), 6),
+        "lon": np.round(BASE_LON + rng.uniform(-0.006, 0.006, num), 6),
+        "baseline": rng.uniform(10, 70, num),
     }
 
+def make_telemetry(fleet):
+    """One telemetry payload per device, with all random draws done as array ops."""
+    n = len(fleet["ids"])
+    # slow drift up, occasional drop simulated by random choice
+    drift = rng.uniform(-0.6, 1.2, n)
+    noise = rng.normal(0, 2.0, n)
+    fill = np.clip(fleet["baseline"] + drift + noise, 0, 100)
+    emptied = rng.random(n) < 0.01  # rare emptying event
+    fill[emptied] = np.maximum(0, fill[emptied] - rng.uniform(30, 95, emptied.sum()))
+    battery = np.maximum(10.0, 100 - rng.uniform(0, 0.3, n))
+    rssi = -60 + rng.integers(-8, 9, n)
+    full = (fill > 80).tolist()
+    ts = now_iso()
+    # rounding done on the arrays; the loop below only zips Python scalars into dicts
+    return [
+        {
+            "device_id": dev,
+            "timestamp": ts,
+            "lat": lat,
+            "lon": lon,
+            "fill_pct": f,
+            "battery_pct": b,
+            "rssi": r,
+            "status": "Full" if is_full else "Active"
+        }
+        for dev, lat, lon, f, b, r, is_full in zip(
+            fleet["ids"], fleet["lat"].tolist(), fleet["lon"].tolist(),
+            np.round(fill, 2).tolist(), np.round(battery, 2).tolist(), rssi.tolist(), full)
+    ]
+
 def upload_evidence(device_id, lat, lon, fill_pct):
-    """Download a placeholder image and upload as multipart to EVIDENCE_ENDPOINT"""
+    """Upload a placeholder image as multipart to EVIDENCE_ENDPOINT"""
     if not EVIDENCE_ENDPOINT:
         print(f"[{device_id}] No EVIDENCE_ENDPOINT configured — skipping evidence upload")
         return None
     try:
-        # fetch a random placeholder image (small)
-        img_resp = requests.get("https://picsum.photos/400/300", timeout=8)
-        img_bytes = img_resp.content
+        if _IMG_POOL:
+            img_bytes = random.choice(_IMG_POOL)
+        else:
+            # pool failed to load at startup: fetch a random placeholder image (small)
+            img_bytes = _SESSION.get("https://picsum.photos/400/300", timeout=8).content
         files = {
             "file": ("evidence.jpg", img_bytes, "image/jpeg")
         }
@@ -64,42 +123,62 @@ def upload_evidence(device_id, lat, lon, fill_pct):
             "fill_pct": fill_pct,
             "event_type": "illegal_dump"
         }
-        r = requests.post(EVIDENCE_ENDPOINT, files=files, data=data, timeout=12)
+        r = _SESSION.post(EVIDENCE_ENDPOINT, files=files, data=data, timeout=12)
         print(f"[{device_id}] Evidence upload {r.status_code} -> {r.text[:200]}")
         return r
     except Exception as e:
         print(f"[{device_id}] Evidence upload failed: {e}")
         return None
 
-def device_loop(device_id, lat, lon, baseline_fill):
+async def post_telemetry(session, payload, timeout):
+    device_id = payload["device_id"]
+    try:
+        async with session.post(SIM_ENDPOINT, json=payload, timeout=timeout) as r:
+            print(f"[{device_id}] Telemetry {r.status} {payload['fill_pct']}")
+    except Exception as e:
+        print(f"[{device_id}] Telemetry POST error: {e}")
+
+_upload_tasks = set()  # in-flight evidence uploads (strong refs so they aren't garbage-collected)
+
+async def fleet_loop(session, fleet):
+    """Advance every device in one tick, then post all payloads concurrently."""
+    loop = asyncio.get_running_loop()
+    timeout = aiohttp.ClientTimeout(total=8)
     while True:
-        payload = make_telemetry(device_id, lat, lon, baseline_fill)
-        try:
-            r = requests.post(SIM_ENDPOINT, json=payload, timeout=8)
-            print(f"[{device_id}] Telemetry {r.status_code if r is not None else 'ERR'} {payload['fill_pct']}")
-        except Exception as e:
-            print(f"[{device_id}] Telemetry POST error: {e}")
+        started = loop.time()
+        payloads = make_telemetry(fleet)
+        await asyncio.gather(*(post_telemetry(session, p, timeout) for p in payloads))
 
-        # maybe trigger illegal dump event
-        if random.random() < DUMP_PROB:
-            print(f"[{device_id}] >>> Simulating illegal dump event!")
-            upload_evidence(device_id, lat, lon, payload["fill_pct"])
+        # maybe trigger illegal dump events
+        for i in np.flatnonzero(rng.random(len(payloads)) < DUMP_PROB).tolist():
+            p = payloads[i]
+            print(f"[{p['device_id']}] >>> Simulating illegal dump event!")
+            # rare and blocking (requests multipart) -> run off the event loop, without holding up the next tick
+            task = asyncio.create_task(asyncio.to_thread(upload_evidence, p["device_id"], p["lat"], p["lon"], p["fill_pct"]))
+            _upload_tasks.add(task)
+            task.add_done_callback(_upload_tasks.discard)
 
-        time.sleep(INTERVAL + random.uniform(-1.5, 1.5))
+        elapsed = loop.time() - started
+        await asyncio.sleep(max(0, INTERVAL + random.uniform(-1.5, 1.5) - elapsed))
+
+async def run_devices(num):
+    fleet = make_fleet(num)
+    for dev, lat, lon in zip(fleet["ids"], fleet["lat"].tolist(), fleet["lon"].tolist()):
+        print("Started", dev, "pos", round(lat,5), round(lon,5))
+    # one shared session: all devices multiplex over a pooled set of keep-alive connections
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await fleet_loop(session, fleet)
 
 def spawn(num=NUM_DEVICES):
     print("SIM START", "endpoint=", SIM_ENDPOINT, "evidence=", bool(EVIDENCE_ENDPOINT))
-    for i in range(num):
-        dev = f"VIRTUAL-BIN-{i+1:03d}"
-        lat = BASE_LAT + random.uniform(-0.006, 0.006)
-        lon = BASE_LON + random.uniform(-0.006, 0.006)
-        baseline = random.uniform(10, 70)
-        t = threading.Thread(target=device_loop, args=(dev, lat, lon, baseline), daemon=True)
-        t.start()
-        print("Started", dev, "pos", round(lat,5), round(lon,5))
+    if EVIDENCE_ENDPOINT:
+        load_image_pool()
     try:
-        while True:
-            time.sleep(60)
+        if uvloop is not None:
+            uvloop.run(run_devices(num))
+        else:
+            asyncio.run(run_devices(num))
     except KeyboardInterrupt:
         print("Simulator stopped.")
 
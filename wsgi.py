@@ -0,0 +1,5 @@
+# wsgi.py
+# Production entry point: gunicorn wsgi:application (settings in gunicorn.conf.py)
+from app import app
+
+application = app